@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from .. import crud, schemas
+from ..database import get_db
+
+router = APIRouter(prefix="/api/archive", tags=["archive"])
+
+@router.get("/", response_model=schemas.ArchivedTodoListResponse)
+async def get_archived_todos(
+    skip: int = Query(0, ge=0, description="跳过的记录数"),
+    limit: int = Query(100, ge=1, le=1000, description="返回的记录数限制"),
+    todo_id: Optional[int] = Query(None, description="按归档前的待办事项ID筛选"),
+    db: Session = Depends(get_db)
+):
+    """获取已归档的待办事项列表"""
+    try:
+        todos = crud.get_archived_todos(db, skip=skip, limit=limit, todo_id=todo_id)
+        total = crud.get_archived_todos_count(db, todo_id=todo_id)
+
+        return schemas.ArchivedTodoListResponse(
+            success=True,
+            data=todos,
+            total=total
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取归档待办事项失败: {str(e)}")
+
+@router.get("/{archive_id}", response_model=schemas.SingleArchivedTodoResponse)
+async def get_archived_todo(
+    archive_id: int,
+    db: Session = Depends(get_db)
+):
+    """根据归档ID获取单个已归档的待办事项"""
+    db_todo = crud.get_archived_todo(db, archive_id=archive_id)
+    if db_todo is None:
+        raise HTTPException(status_code=404, detail="归档待办事项不存在")
+
+    return schemas.SingleArchivedTodoResponse(
+        success=True,
+        data=db_todo
+    )
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from .. import crud, schemas
+from ..database import get_db
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+@router.get("/", response_model=schemas.JobListResponse)
+async def get_jobs(
+    db: Session = Depends(get_db)
+):
+    """获取后台任务列表（最近提交的在前）"""
+    return schemas.JobListResponse(
+        success=True,
+        data=crud.get_jobs(db)
+    )
+
+@router.get("/{job_id}", response_model=schemas.SingleJobResponse)
+async def get_job(
+    job_id: str,
+    db: Session = Depends(get_db)
+):
+    """获取后台任务的状态和进度"""
+    db_job = crud.get_job(db, job_id=job_id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    return schemas.SingleJobResponse(
+        success=True,
+        data=db_job
+    )
@@ -1,22 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Union
+from datetime import datetime, timezone
 from .. import crud, models, schemas
 from ..database import get_db
+from ..jobs import job_manager, delete_todos_job
+from ..singleflight import todo_reads
 
 router = APIRouter(prefix="/api/todos", tags=["todos"])
 
+FIELDS_DESCRIPTION = f"逗号分隔的返回字段，可选: {', '.join(schemas.TODO_FIELDS)}（id始终返回）"
+
+def parse_fields(fields: Optional[str], default: List[str]) -> List[str]:
+    """解析fields查询参数，未提供时使用默认字段"""
+    if fields is None:
+        return list(default)
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    invalid = [f for f in selected if f not in schemas.TODO_FIELDS]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"无效的字段: {', '.join(invalid)}")
+    return selected
+
 @router.get("/", response_model=schemas.TodoListResponse)
 async def get_todos(
     status: Optional[str] = Query(None, pattern="^(all|completed|pending)$", description="筛选条件: all, completed, pending"),
     skip: int = Query(0, ge=0, description="跳过的记录数"),
     limit: int = Query(100, ge=1, le=1000, description="返回的记录数限制"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION + "；默认不返回description"),
+    sort: str = Query("created_at", pattern=f"^({'|'.join(schemas.TODO_SORT_FIELDS)})$", description="排序字段: created_at, updated_at, title"),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="排序方向: asc, desc"),
     db: Session = Depends(get_db)
 ):
     """获取待办事项列表"""
+    selected_fields = parse_fields(fields, schemas.TODO_LIST_DEFAULT_FIELDS)
+    # 规范化查询条件作为合并key，相同的并发请求只查询一次；
+    # key包含数据库中的写入代数，任何进程写入后到达的请求都不会共享写入前开始的查询
+    status = status or "all"
     try:
-        todos = crud.get_todos(db, status=status, skip=skip, limit=limit)
-        total = crud.get_todos_count(db, status=status)
+        generation = crud.get_todo_generation(db)
+        # 归还连接：等待共享结果期间不占用连接池，查询本身使用独立会话
+        db.close()
+        key = ("todos", generation, status, skip, limit, tuple(sorted(set(selected_fields))), sort, order)
+        todos, total = await todo_reads.do(
+            key, _load_todo_list, db.get_bind(), status, skip, limit, selected_fields, sort, order
+        )
         
         return schemas.TodoListResponse(
             success=True,
@@ -26,6 +53,15 @@ async def get_todos(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取待办事项失败: {str(e)}")
 
+def _load_todo_list(bind, status, skip, limit, fields, sort, order):
+    """查询列表和总数；结果可能被多个请求共享，因此使用独立会话而非请求的会话"""
+    with Session(bind=bind) as db:
+        todos = crud.get_todos(
+            db, status=status, skip=skip, limit=limit, fields=fields, sort=sort, order=order
+        )
+        total = crud.get_todos_count(db, status=status)
+    return todos, total
+
 @router.post("/", response_model=schemas.SingleTodoResponse, status_code=201)
 async def create_todo(
     todo: schemas.TodoCreate,
@@ -42,17 +78,19 @@ async def create_todo(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"创建待办事项失败: {str(e)}")
 
-@router.get("/{todo_id}", response_model=schemas.SingleTodoResponse)
+@router.get("/{todo_id}", response_model=schemas.SingleTodoPartialResponse)
 async def get_todo(
     todo_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION + "；默认返回全部字段"),
     db: Session = Depends(get_db)
 ):
     """获取单个待办事项"""
-    db_todo = crud.get_todo(db, todo_id=todo_id)
+    selected_fields = parse_fields(fields, schemas.TODO_FIELDS)
+    db_todo = crud.get_todo_fields(db, todo_id=todo_id, fields=selected_fields)
     if db_todo is None:
         raise HTTPException(status_code=404, detail="待办事项不存在")
     
-    return schemas.SingleTodoResponse(
+    return schemas.SingleTodoPartialResponse(
         success=True,
         data=db_todo
     )
@@ -101,12 +139,33 @@ async def toggle_todo(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"切换状态失败: {str(e)}")
 
-@router.delete("/completed", response_model=schemas.DeleteResponse)
+def _submit_delete_todos_job(db: Session, job_type: str, completed_only: bool):
+    """提交分块删除任务；在提交时记录删除范围，任务只删除此刻已存在（且已完成）的事项"""
+    return job_manager.submit(db.get_bind(), job_type, delete_todos_job(
+        completed_only=completed_only,
+        max_id=crud.get_max_todo_id(db),
+        updated_before=datetime.now(timezone.utc).replace(tzinfo=None)
+    ))
+
+BACKGROUND_DESCRIPTION = "是否作为后台任务分块执行，立即返回202和任务ID"
+
+@router.delete("/completed", response_model=Union[schemas.DeleteResponse, schemas.SingleJobResponse])
 async def delete_completed_todos(
+    response: Response,
+    background: bool = Query(False, description=BACKGROUND_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     """批量删除已完成的待办事项"""
     try:
+        if background:
+            job = _submit_delete_todos_job(db, "delete_completed_todos", completed_only=True)
+            response.status_code = 202
+            return schemas.SingleJobResponse(
+                success=True,
+                message="删除已完成待办事项的任务已提交",
+                data=job
+            )
+
         deleted_count = crud.delete_completed_todos(db)
         return schemas.DeleteResponse(
             success=True,
@@ -116,12 +175,23 @@ async def delete_completed_todos(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"删除已完成待办事项失败: {str(e)}")
 
-@router.delete("/all", response_model=schemas.DeleteResponse)
+@router.delete("/all", response_model=Union[schemas.DeleteResponse, schemas.SingleJobResponse])
 async def delete_all_todos(
+    response: Response,
+    background: bool = Query(False, description=BACKGROUND_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     """清空所有待办事项"""
     try:
+        if background:
+            job = _submit_delete_todos_job(db, "delete_all_todos", completed_only=False)
+            response.status_code = 202
+            return schemas.SingleJobResponse(
+                success=True,
+                message="清空待办事项的任务已提交",
+                data=job
+            )
+
         deleted_count = crud.delete_all_todos(db)
         return schemas.DeleteResponse(
             success=True,
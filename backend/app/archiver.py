@@ -0,0 +1,89 @@
+"""
+已完成待办事项的后台归档任务
+
+定期将完成时间超过指定天数的待办事项分批迁移到归档表，
+每批使用独立的短事务，批次之间短暂让出写锁，避免长时间阻塞其他写请求。
+归档结束后执行增量VACUUM和PRAGMA optimize，使todos表大小保持有界。
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from . import crud
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# 归档配置（可通过环境变量覆盖）
+ARCHIVE_ENABLED = os.getenv("TODO_ARCHIVE_ENABLED", "true").lower() in ("1", "true", "yes")
+ARCHIVE_AFTER_DAYS = float(os.getenv("TODO_ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("TODO_ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_BATCH_PAUSE_SECONDS = float(os.getenv("TODO_ARCHIVE_BATCH_PAUSE_SECONDS", "0.05"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("TODO_ARCHIVE_INTERVAL_SECONDS", "3600"))
+ARCHIVE_VACUUM_PAGES = int(os.getenv("TODO_ARCHIVE_VACUUM_PAGES", "1000"))
+
+
+def run_archive_cycle(
+    session_factory=SessionLocal,
+    archive_after_days: float = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    batch_pause: float = ARCHIVE_BATCH_PAUSE_SECONDS,
+    vacuum_pages: int = ARCHIVE_VACUUM_PAGES,
+    stop_event: threading.Event = None
+) -> int:
+    """执行一轮归档，返回本轮归档的记录数"""
+    # created_at/updated_at 由SQLite的CURRENT_TIMESTAMP生成，为UTC时间
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=archive_after_days)
+    archived_total = 0
+
+    db = session_factory()
+    try:
+        while stop_event is None or not stop_event.is_set():
+            archived = crud.archive_completed_todos(db, cutoff=cutoff, batch_size=batch_size)
+            archived_total += archived
+            if archived < batch_size:
+                break
+            # 批次之间让出写锁
+            time.sleep(batch_pause)
+
+        if archived_total:
+            crud.optimize_database(db, vacuum_pages=vacuum_pages)
+    finally:
+        db.close()
+
+    if archived_total:
+        logger.info(f"归档完成: 本轮归档 {archived_total} 个已完成的待办事项")
+    return archived_total
+
+
+class ArchiveScheduler:
+    """按固定间隔在后台线程中执行归档任务"""
+
+    def __init__(self, interval: float = ARCHIVE_INTERVAL_SECONDS, session_factory=SessionLocal):
+        self.interval = interval
+        self.session_factory = session_factory
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="todo-archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                run_archive_cycle(session_factory=self.session_factory, stop_event=self._stop_event)
+            except Exception as e:
+                logger.error(f"归档任务执行失败: {str(e)}")
+            self._stop_event.wait(self.interval)
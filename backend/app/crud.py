@@ -1,16 +1,26 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import asc, desc, func, insert, delete, select, text, update
+from datetime import datetime, timezone
+import uuid
 from . import models, schemas
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-def get_todos(
-    db: Session, 
+def _todo_columns(fields: Sequence[str]):
+    """将字段名转换为Todo表的列，id始终包含在内"""
+    names = ["id"] + [f for f in fields if f != "id"]
+    return [getattr(models.Todo, name) for name in names]
+
+def build_todos_query(
+    db: Session,
     status: Optional[str] = None,
-    skip: int = 0, 
-    limit: int = 100
-) -> List[models.Todo]:
-    """获取待办事项列表"""
-    query = db.query(models.Todo)
+    sort: str = "created_at",
+    order: str = "desc",
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[Sequence[str]] = None
+):
+    """构建待办事项列表查询（筛选、排序、分页）"""
+    query = db.query(*_todo_columns(fields)) if fields is not None else db.query(models.Todo)
     
     # 根据状态筛选
     if status == "completed":
@@ -19,23 +29,67 @@ def get_todos(
         query = query.filter(models.Todo.completed == False)
     # status == "all" 或 None 时不添加筛选条件
     
-    return query.order_by(desc(models.Todo.created_at)).offset(skip).limit(limit).all()
+    # 以id作为第二排序键保证分页稳定；两列方向一致才能直接使用复合索引
+    sort_column = getattr(models.Todo, sort)
+    direction = desc if order == "desc" else asc
+    query = query.order_by(direction(sort_column), direction(models.Todo.id))
+    
+    return query.offset(skip).limit(limit)
+
+def get_todos(
+    db: Session, 
+    status: Optional[str] = None,
+    skip: int = 0, 
+    limit: int = 100,
+    fields: Optional[Sequence[str]] = None,
+    sort: str = "created_at",
+    order: str = "desc"
+) -> List[Any]:
+    """获取待办事项列表
+
+    fields为None时返回完整的Todo实体；否则只查询指定的列，返回字典列表，
+    未选择的列（如description）不会从数据库中读取。
+    """
+    rows = build_todos_query(
+        db, status=status, sort=sort, order=order, skip=skip, limit=limit, fields=fields
+    ).all()
+    if fields is not None:
+        return [dict(row._mapping) for row in rows]
+    return rows
 
 def get_todos_count(db: Session, status: Optional[str] = None) -> int:
     """获取待办事项总数"""
-    query = db.query(models.Todo)
+    # 直接count(id)，避免Query.count()生成包含全部列的子查询
+    query = db.query(func.count(models.Todo.id))
     
     if status == "completed":
         query = query.filter(models.Todo.completed == True)
     elif status == "pending":
         query = query.filter(models.Todo.completed == False)
     
-    return query.count()
+    return query.scalar()
+
+def get_todo_generation(db: Session) -> int:
+    """获取todos表的写入代数（任何写入后都会变化）"""
+    return db.scalar(select(models.TodoGeneration.value).where(models.TodoGeneration.id == 1)) or 0
+
+def _bump_todo_generation(db: Session) -> None:
+    """写入代数加一；在写操作的事务中、提交之前调用，每条写语句只更新一次"""
+    db.execute(
+        update(models.TodoGeneration)
+        .where(models.TodoGeneration.id == 1)
+        .values(value=models.TodoGeneration.value + 1)
+    )
 
 def get_todo(db: Session, todo_id: int) -> Optional[models.Todo]:
     """根据ID获取单个待办事项"""
     return db.query(models.Todo).filter(models.Todo.id == todo_id).first()
 
+def get_todo_fields(db: Session, todo_id: int, fields: Sequence[str]) -> Optional[Dict[str, Any]]:
+    """根据ID获取单个待办事项的指定字段"""
+    row = db.query(*_todo_columns(fields)).filter(models.Todo.id == todo_id).first()
+    return dict(row._mapping) if row is not None else None
+
 def create_todo(db: Session, todo: schemas.TodoCreate) -> models.Todo:
     """创建新的待办事项"""
     db_todo = models.Todo(
@@ -44,6 +98,7 @@ def create_todo(db: Session, todo: schemas.TodoCreate) -> models.Todo:
         completed=False
     )
     db.add(db_todo)
+    _bump_todo_generation(db)
     db.commit()
     db.refresh(db_todo)
     return db_todo
@@ -59,6 +114,7 @@ def update_todo(db: Session, todo_id: int, todo_update: schemas.TodoUpdate) -> O
     for field, value in update_data.items():
         setattr(db_todo, field, value)
     
+    _bump_todo_generation(db)
     db.commit()
     db.refresh(db_todo)
     return db_todo
@@ -70,6 +126,7 @@ def toggle_todo(db: Session, todo_id: int) -> Optional[models.Todo]:
         return None
     
     db_todo.completed = not db_todo.completed
+    _bump_todo_generation(db)
     db.commit()
     db.refresh(db_todo)
     return db_todo
@@ -81,19 +138,195 @@ def delete_todo(db: Session, todo_id: int) -> bool:
         return False
     
     db.delete(db_todo)
+    _bump_todo_generation(db)
     db.commit()
     return True
 
 def delete_completed_todos(db: Session) -> int:
     """删除所有已完成的待办事项"""
-    deleted_count = db.query(models.Todo).filter(models.Todo.completed == True).count()
-    db.query(models.Todo).filter(models.Todo.completed == True).delete()
+    # 直接使用DELETE的影响行数，无需额外的count()查询
+    deleted_count = db.query(models.Todo).filter(models.Todo.completed == True).delete()
+    if deleted_count:
+        _bump_todo_generation(db)
     db.commit()
     return deleted_count
 
 def delete_all_todos(db: Session) -> int:
     """删除所有待办事项"""
-    deleted_count = db.query(models.Todo).count()
-    db.query(models.Todo).delete()
+    deleted_count = db.query(models.Todo).delete()
+    if deleted_count:
+        _bump_todo_generation(db)
+    db.commit()
+    return deleted_count
+
+def get_max_todo_id(db: Session) -> int:
+    """获取当前最大的待办事项ID，表为空时返回0"""
+    return db.scalar(select(func.max(models.Todo.id))) or 0
+
+def _bulk_delete_conditions(completed_only: bool, max_id: int, updated_before: Optional[datetime]):
+    """批量删除的范围：提交任务时已存在（id <= max_id）且当时已完成的记录"""
+    conditions = [models.Todo.id <= max_id]
+    if completed_only:
+        conditions.append(models.Todo.completed == True)
+        # 提交任务之后才被标记为完成的记录不删除
+        if updated_before is not None:
+            conditions.append(models.Todo.updated_at <= updated_before)
+    return conditions
+
+def count_todos_for_bulk_delete(
+    db: Session,
+    completed_only: bool,
+    max_id: int,
+    updated_before: Optional[datetime] = None
+) -> int:
+    """统计批量删除范围内的记录数"""
+    return db.scalar(
+        select(func.count(models.Todo.id)).where(*_bulk_delete_conditions(completed_only, max_id, updated_before))
+    )
+
+def delete_todos_chunk(
+    db: Session,
+    max_id: int,
+    completed_only: bool = False,
+    updated_before: Optional[datetime] = None,
+    after_id: int = 0,
+    chunk_size: int = 1000
+) -> Tuple[int, int]:
+    """按id升序删除一块范围内的待办事项（单个短事务）
+
+    返回 (删除的记录数, 本块最后一个id)，下一块从该id之后继续；返回的id未推进表示已删除完毕。
+    按id升序且只向后推进，删除过程中新建的记录（SQLite可能复用已删除的最大ID）不会被选中。
+    与归档任务相同，先以BEGIN IMMEDIATE获取写锁再选取，DELETE也重复范围条件，
+    选取之后被其他请求修改（如重新标记为未完成）或被归档的记录不会被删除或计入。
+    """
+    conditions = _bulk_delete_conditions(completed_only, max_id, updated_before)
+    db.commit()
+    db.execute(text("BEGIN IMMEDIATE"))
+    ids = db.execute(
+        select(models.Todo.id)
+        .where(models.Todo.id > after_id, *conditions)
+        .order_by(models.Todo.id)
+        .limit(chunk_size)
+    ).scalars().all()
+    if not ids:
+        db.commit()
+        return 0, after_id
+
+    deleted_count = db.execute(
+        delete(models.Todo).where(models.Todo.id.in_(ids), *conditions)
+    ).rowcount
+    if deleted_count:
+        _bump_todo_generation(db)
+    db.commit()
+    return deleted_count, ids[-1]
+
+def archive_completed_todos(db: Session, cutoff: datetime, batch_size: int = 500) -> int:
+    """将更新时间早于cutoff的已完成待办事项迁移到归档表（单批次、单个短事务）
+
+    多个进程（如uvicorn多worker）可能同时运行归档任务，因此先以BEGIN IMMEDIATE
+    获取写锁再选取批次，保证选取和迁移之间不会有其他归档任务处理同一批记录。
+    """
+    db.commit()
+    db.execute(text("BEGIN IMMEDIATE"))
+    ids = db.execute(
+        select(models.Todo.id)
+        .where(models.Todo.completed == True, models.Todo.updated_at < cutoff)
+        .order_by(models.Todo.updated_at, models.Todo.id)
+        .limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        db.commit()
+        return 0
+
+    columns = ["title", "description", "completed", "created_at", "updated_at"]
+    db.execute(
+        insert(models.ArchivedTodo).from_select(
+            ["todo_id"] + columns,
+            select(models.Todo.id, *[getattr(models.Todo, c) for c in columns]).where(models.Todo.id.in_(ids))
+        )
+    )
+    db.execute(delete(models.Todo).where(models.Todo.id.in_(ids)))
+    _bump_todo_generation(db)
+    db.commit()
+    return len(ids)
+
+def optimize_database(db: Session, vacuum_pages: int = 1000) -> None:
+    """回收部分空闲页并更新查询优化器统计信息"""
+    db.commit()
+    # sqlite3驱动的execute()只会执行一步，incremental_vacuum每步仅释放一页，
+    # 因此通过executescript让语句执行完毕
+    dbapi_connection = db.connection().connection.driver_connection
+    dbapi_connection.executescript(
+        f"PRAGMA incremental_vacuum({int(vacuum_pages)}); PRAGMA optimize;"
+    )
+    db.commit()
+
+def get_archived_todos(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    todo_id: Optional[int] = None
+) -> List[models.ArchivedTodo]:
+    """获取已归档的待办事项列表，可按原待办事项ID筛选"""
+    query = db.query(models.ArchivedTodo)
+    if todo_id is not None:
+        query = query.filter(models.ArchivedTodo.todo_id == todo_id)
+    return (
+        query
+        .order_by(desc(models.ArchivedTodo.archived_at), desc(models.ArchivedTodo.id))
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+def get_archived_todos_count(db: Session, todo_id: Optional[int] = None) -> int:
+    """获取已归档的待办事项总数"""
+    query = db.query(func.count(models.ArchivedTodo.id))
+    if todo_id is not None:
+        query = query.filter(models.ArchivedTodo.todo_id == todo_id)
+    return query.scalar()
+
+def get_archived_todo(db: Session, archive_id: int) -> Optional[models.ArchivedTodo]:
+    """根据归档ID获取单个已归档的待办事项"""
+    return db.query(models.ArchivedTodo).filter(models.ArchivedTodo.id == archive_id).first()
+
+def create_job(db: Session, job_type: str) -> models.Job:
+    """创建后台任务记录"""
+    db_job = models.Job(id=uuid.uuid4().hex, type=job_type, status=models.Job.PENDING, processed=0)
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def get_job(db: Session, job_id: str) -> Optional[models.Job]:
+    """根据ID获取后台任务"""
+    return db.query(models.Job).filter(models.Job.id == job_id).first()
+
+def get_jobs(db: Session, limit: int = 100) -> List[models.Job]:
+    """获取后台任务列表（最近提交的在前）"""
+    return db.query(models.Job).order_by(desc(models.Job.created_at), desc(models.Job.id)).limit(limit).all()
+
+def fail_unfinished_jobs(db: Session, error: str, job_ids: Optional[Sequence[str]] = None) -> int:
+    """将未结束（pending/running）的任务标记为失败，job_ids为None时处理全部未结束任务"""
+    conditions = [models.Job.status.in_([models.Job.PENDING, models.Job.RUNNING])]
+    if job_ids is not None:
+        conditions.append(models.Job.id.in_(job_ids))
+    failed_count = db.execute(
+        update(models.Job)
+        .where(*conditions)
+        .values(status=models.Job.FAILED, error=error, finished_at=datetime.now(timezone.utc))
+    ).rowcount
+    db.commit()
+    return failed_count
+
+def prune_jobs(db: Session, keep: int = 100) -> int:
+    """删除最近keep条以外的已结束任务记录"""
+    recent_ids = select(models.Job.id).order_by(desc(models.Job.created_at), desc(models.Job.id)).limit(keep)
+    deleted_count = db.execute(
+        delete(models.Job).where(
+            models.Job.status.in_([models.Job.COMPLETED, models.Job.FAILED]),
+            models.Job.id.not_in(recent_ids)
+        )
+    ).rowcount
     db.commit()
     return deleted_count
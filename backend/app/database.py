@@ -1,7 +1,11 @@
 from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import declarative_base, sessionmaker
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 # 数据库配置
 DATABASE_URL = "sqlite:///./todos.db"
 
@@ -18,6 +22,49 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # 创建Base类
 Base = declarative_base()
 
+# 已从模型中移除、需要从旧数据库中删除的索引
+OBSOLETE_INDEXES = (
+    "ix_todos_completed",  # 已被 (completed, ...) 复合索引的前缀覆盖
+)
+
+# SQLite的auto_vacuum模式值
+AUTO_VACUUM_INCREMENTAL = 2
+
+def init_db(bind=engine):
+    """创建数据库表，并为已有数据库补齐新增的索引（可重复执行）
+
+    create_all只会创建不存在的表，不会为已存在的表添加索引，
+    因此这里逐个检查模型中的索引并补建，同时删除已废弃的索引，并初始化写入代数。
+    """
+    from . import models  # 确保模型已注册到Base.metadata
+
+    _enable_incremental_vacuum(bind)
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as conn:
+        for index_name in OBSOLETE_INDEXES:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index_name}")
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        conn.exec_driver_sql("INSERT OR IGNORE INTO todo_generation (id, value) VALUES (1, 0)")
+
+def _enable_incremental_vacuum(bind):
+    """启用增量VACUUM，便于归档后分批回收空闲页
+
+    auto_vacuum只对新建的数据库直接生效，已有数据库需要执行一次完整VACUUM才能切换模式。
+    """
+    with bind.connect() as conn:
+        # VACUUM不能在事务中执行
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == AUTO_VACUUM_INCREMENTAL:
+            return
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        try:
+            conn.exec_driver_sql("VACUUM")
+        except OperationalError as e:
+            # 如多worker同时启动时其他进程正在执行VACUUM，下次启动时重试
+            logger.warning(f"切换增量VACUUM模式失败，空闲页暂时无法回收: {str(e)}")
+
 # 数据库依赖
 def get_db():
     db = SessionLocal()
@@ -0,0 +1,142 @@
+"""
+批量写操作的后台任务
+
+批量删除等耗时的写操作可以提交为后台任务：请求立即返回任务ID，
+任务在提交请求的进程的后台线程中按块执行，每块使用独立的短事务，块之间短暂让出写锁，
+其他写请求因此不会被长时间阻塞。任务状态保存在jobs表中，
+多worker部署时可通过任意worker的 GET /api/jobs/{id} 查询进度。
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from . import crud, models
+
+logger = logging.getLogger(__name__)
+
+# 批量操作配置（可通过环境变量覆盖）
+BULK_CHUNK_SIZE = int(os.getenv("TODO_BULK_CHUNK_SIZE", "1000"))
+BULK_CHUNK_PAUSE_SECONDS = float(os.getenv("TODO_BULK_CHUNK_PAUSE_SECONDS", "0.01"))
+# 数据库中最多保留的任务记录数，超出后删除最早结束的任务
+MAX_FINISHED_JOBS = 100
+
+# 任务函数：func(job, db, stop_event)，在db会话中执行并更新job.total/job.processed，
+# 进度随每块的提交一起写入数据库
+JobFunc = Callable[[models.Job, Session, threading.Event], None]
+
+
+class JobManager:
+    """在单个后台线程中依次执行任务，任务状态保存在数据库中"""
+
+    def __init__(self, max_workers: int = 1):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def submit(self, bind, job_type: str, func: JobFunc) -> models.Job:
+        """创建任务记录并提交到后台线程执行，返回任务记录"""
+        with Session(bind=bind, expire_on_commit=False) as db:
+            crud.prune_jobs(db, keep=MAX_FINISHED_JOBS)
+            job = crud.create_job(db, job_type)
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="todo-job")
+            future = self._executor.submit(self._run, bind, job.id, func, self._stop_event)
+        future.add_done_callback(lambda f, job_id=job.id: self._on_done(bind, job_id, f))
+        return job
+
+    def recover(self, bind) -> int:
+        """启动时将上次运行遗留的未结束任务标记为失败，返回处理的任务数
+
+        进程退出时未执行或未执行完的任务不会再继续，不标记的话会一直停留在pending/running状态。
+        """
+        with Session(bind=bind) as db:
+            failed_count = crud.fail_unfinished_jobs(db, "服务重启，任务未完成")
+        if failed_count:
+            logger.warning(f"已将 {failed_count} 个未完成的后台任务标记为失败")
+        return failed_count
+
+    def shutdown(self):
+        """通知进行中的任务在当前块结束后停止，并取消尚未开始的任务（标记为失败）"""
+        with self._lock:
+            self._stop_event.set()
+            self._stop_event = threading.Event()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(self, bind, job_id: str, future):
+        # 被shutdown取消的任务不会执行_run，需要在这里更新任务状态
+        if future.cancelled():
+            with Session(bind=bind) as db:
+                crud.fail_unfinished_jobs(db, "服务停止，任务未执行", job_ids=[job_id])
+
+    def _run(self, bind, job_id: str, func: JobFunc, stop_event: threading.Event):
+        with Session(bind=bind) as db:
+            job = crud.get_job(db, job_id)
+            job.status = models.Job.RUNNING
+            job.started_at = datetime.now(timezone.utc)
+            db.commit()
+            try:
+                func(job, db, stop_event)
+                job.status = models.Job.COMPLETED
+            except Exception as e:
+                logger.error(f"后台任务执行失败: {job_id}, {str(e)}")
+                db.rollback()
+                job.error = str(e)
+                job.status = models.Job.FAILED
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+
+
+def delete_todos_job(
+    completed_only: bool,
+    max_id: int,
+    updated_before: Optional[datetime] = None,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    chunk_pause: float = BULK_CHUNK_PAUSE_SECONDS
+) -> JobFunc:
+    """创建分块删除待办事项的任务函数
+
+    只删除提交任务时已存在的记录（id <= max_id）；删除已完成事项时，
+    还只删除在updated_before之前已完成的记录，任务执行期间新建或新完成的事项会被保留。
+    """
+
+    def run(job: models.Job, db: Session, stop_event: threading.Event):
+        job.total = crud.count_todos_for_bulk_delete(
+            db, completed_only=completed_only, max_id=max_id, updated_before=updated_before
+        )
+        db.commit()
+        after_id = 0
+        while True:
+            if stop_event.is_set():
+                raise RuntimeError("服务停止，任务被中断")
+            deleted, last_id = crud.delete_todos_chunk(
+                db,
+                max_id=max_id,
+                completed_only=completed_only,
+                updated_before=updated_before,
+                after_id=after_id,
+                chunk_size=chunk_size
+            )
+            if last_id == after_id:
+                break
+            after_id = last_id
+            job.processed += deleted
+            db.commit()
+            # 块之间让出写锁
+            time.sleep(chunk_pause)
+
+    return run
+
+
+# 应用使用的任务管理器
+job_manager = JobManager()
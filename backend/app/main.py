@@ -1,16 +1,32 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from .database import engine, Base
-from .api import todos
+from contextlib import asynccontextmanager
+from .database import init_db, engine
+from .api import todos, archive, jobs
+from .archiver import ArchiveScheduler, ARCHIVE_ENABLED
+from .jobs import job_manager
+from .singleflight import todo_reads
 import logging
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# 创建数据库表
-Base.metadata.create_all(bind=engine)
+# 创建数据库表并补齐索引
+init_db()
+
+# 应用生命周期：启动/停止后台归档任务，启动时清理遗留的未完成任务，停止时结束进行中的批量任务
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_manager.recover(engine)
+    scheduler = ArchiveScheduler() if ARCHIVE_ENABLED else None
+    if scheduler:
+        scheduler.start()
+    yield
+    if scheduler:
+        scheduler.stop()
+    job_manager.shutdown()
 
 # 创建FastAPI应用实例
 app = FastAPI(
@@ -18,7 +34,8 @@ app = FastAPI(
     description="基于FastAPI的待办事项管理系统",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # 配置CORS
@@ -32,6 +49,8 @@ app.add_middleware(
 
 # 注册路由
 app.include_router(todos.router)
+app.include_router(archive.router)
+app.include_router(jobs.router)
 
 # 全局异常处理
 @app.exception_handler(HTTPException)
@@ -79,3 +98,11 @@ async def health_check():
         "status": "healthy",
         "message": "API服务正常运行"
     }
+
+# 运行指标
+@app.get("/metrics")
+async def metrics():
+    return {
+        "success": True,
+        "singleflight": todo_reads.stats()
+    }
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Index
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 from .database import Base
 
 class Todo(Base):
@@ -8,9 +9,75 @@ class Todo(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     title = Column(String(255), nullable=False, index=True)
     description = Column(Text, nullable=True)
-    completed = Column(Boolean, default=False, nullable=False, index=True)
+    completed = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    # 列表查询的复合索引：按状态筛选+排序时可直接按索引顺序读取，无需临时排序
+    # (completed, ...) 前缀同时满足按状态的计数查询；title排序复用title单列索引(隐含rowid)
+    __table_args__ = (
+        Index("ix_todos_completed_created_at", "completed", "created_at", "id"),
+        Index("ix_todos_completed_updated_at", "completed", "updated_at", "id"),
+        Index("ix_todos_completed_title", "completed", "title", "id"),
+        Index("ix_todos_created_at", "created_at", "id"),
+        Index("ix_todos_updated_at", "updated_at", "id"),
+    )
+
     def __repr__(self):
         return f"<Todo(id={self.id}, title='{self.title}', completed={self.completed})>"
+
+class ArchivedTodo(Base):
+    """已归档的待办事项（从todos表迁出的已完成事项）"""
+    __tablename__ = "archived_todos"
+
+    # todos表的ID会被SQLite复用（删除最大ID或清空后），因此归档表使用独立主键，
+    # 原ID保存在todo_id中，同一todo_id可能对应多条归档记录
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    todo_id = Column(Integer, nullable=False, index=True)
+    title = Column(String(255), nullable=False)
+    description = Column(Text, nullable=True)
+    completed = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<ArchivedTodo(id={self.id}, todo_id={self.todo_id}, title='{self.title}', archived_at={self.archived_at})>"
+
+class Job(Base):
+    """后台任务状态（保存在数据库中，多worker部署时任意worker都能查询）"""
+    __tablename__ = "jobs"
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    id = Column(String(32), primary_key=True)
+    type = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default=PENDING)
+    total = Column(Integer, nullable=True)
+    processed = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    # 与started_at/finished_at一样由应用写入，精确到微秒，保证任务列表按提交顺序排列
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (Job.COMPLETED, Job.FAILED)
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, type='{self.type}', status={self.status}, processed={self.processed})>"
+
+class TodoGeneration(Base):
+    """todos表的写入代数：crud中的每个写操作在同一事务中将其加一
+
+    值保存在数据库中，因此其他进程的修改也能被感知，
+    用于single-flight的合并key，避免写入后的读请求共享写入前开始的查询。
+    """
+    __tablename__ = "todo_generation"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_serializer
 from typing import Optional, List
 from datetime import datetime
 
@@ -26,21 +26,80 @@ class TodoResponse(TodoBase):
 
     model_config = {"from_attributes": True}
 
+# 可通过fields参数选择的字段，以及列表接口默认返回的精简字段（不含description）
+TODO_FIELDS = ("id", "title", "description", "completed", "created_at", "updated_at")
+TODO_LIST_DEFAULT_FIELDS = ("id", "title", "completed", "created_at", "updated_at")
+
+# 列表接口支持的排序字段
+TODO_SORT_FIELDS = ("created_at", "updated_at", "title")
+
+# 按字段投影的Todo响应模式，未选择的字段不会出现在响应中
+class TodoPartialResponse(BaseModel):
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    completed: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+    @model_serializer(mode="wrap")
+    def _exclude_unselected(self, handler):
+        # 只输出查询时选择的字段；外层响应（success、message等）不受影响
+        data = handler(self)
+        return {key: value for key, value in data.items() if key in self.model_fields_set}
+
+# 归档Todo响应模式
+class ArchivedTodoResponse(TodoResponse):
+    todo_id: int = Field(..., description="归档前的待办事项ID（可能被新的待办事项复用）")
+    archived_at: datetime
+
 # API响应模式
 class APIResponse(BaseModel):
     success: bool
     message: Optional[str] = None
 
 class TodoListResponse(APIResponse):
-    data: List[TodoResponse]
+    data: List[TodoPartialResponse]
     total: int
 
 class SingleTodoResponse(APIResponse):
     data: TodoResponse
 
+class SingleTodoPartialResponse(APIResponse):
+    data: TodoPartialResponse
+
+class ArchivedTodoListResponse(APIResponse):
+    data: List[ArchivedTodoResponse]
+    total: int
+
+class SingleArchivedTodoResponse(APIResponse):
+    data: ArchivedTodoResponse
+
 class DeleteResponse(APIResponse):
     deleted_count: Optional[int] = None
 
+# 后台任务响应模式
+class JobResponse(BaseModel):
+    id: str
+    type: str
+    status: str
+    total: Optional[int] = None
+    processed: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+class SingleJobResponse(APIResponse):
+    data: JobResponse
+
+class JobListResponse(APIResponse):
+    data: List[JobResponse]
+
 # 错误响应模式
 class ErrorDetail(BaseModel):
     code: str
@@ -0,0 +1,76 @@
+"""
+相同并发读请求的合并（single-flight）
+
+同一时刻到达的相同查询只执行一次：第一个请求负责查询，
+其余请求等待并共享它的结果。合并只在单个进程内进行（多worker部署时
+每个worker各自合并）。调用方需要在key中包含数据版本（如todo_generation），
+使写入后到达的请求不会共享写入前开始的查询。
+"""
+import asyncio
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from starlette.concurrency import run_in_threadpool
+
+SINGLEFLIGHT_ENABLED = os.getenv("TODO_SINGLEFLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class SingleFlight:
+    """按key合并并发执行的函数调用"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._executed = 0
+        self._shared = 0
+
+    async def do(self, key: Hashable, func: Callable[..., Any], *args) -> Any:
+        """在线程池中执行func(*args)；相同key的并发调用共享同一次执行的结果"""
+        if not self.enabled:
+            with self._lock:
+                self._executed += 1
+            return await run_in_threadpool(func, *args)
+
+        with self._lock:
+            task = self._inflight.get(key)
+            if task is not None:
+                self._shared += 1
+            else:
+                self._executed += 1
+                task = asyncio.ensure_future(run_in_threadpool(func, *args))
+                self._inflight[key] = task
+                task.add_done_callback(lambda t, key=key: self._forget(key, t))
+
+        # shield: 某个等待者被取消时不影响其他共享该结果的请求
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回合并统计信息"""
+        with self._lock:
+            executed, shared = self._executed, self._shared
+        total = executed + shared
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._inflight),
+            "requests": total,
+            "executed": executed,
+            "shared": shared,
+            "coalescing_ratio": round(shared / total, 4) if total else 0.0
+        }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._executed = 0
+            self._shared = 0
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+
+# 待办事项读查询使用的single-flight实例
+todo_reads = SingleFlight(enabled=SINGLEFLIGHT_ENABLED)
+
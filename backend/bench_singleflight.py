@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+single-flight请求合并基准测试
+
+模拟整点时大量客户端同时请求相同列表(惊群)的场景，
+分别在关闭/开启请求合并时统计耗时和实际查询次数。
+
+用法: python bench_singleflight.py [--todos 20000] [--clients 300] [--rounds 5]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.database import get_db, init_db
+from app.models import Todo
+from app.singleflight import todo_reads
+
+URL = "/api/todos/?status=pending&limit=100"
+
+
+def setup_database(path: str, todo_count: int):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    init_db(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Todo), [
+            {"title": f"待办事项{i}", "description": "描述" * 50, "completed": i % 3 == 0}
+            for i in range(todo_count)
+        ])
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return engine
+
+
+async def herd(client: httpx.AsyncClient, clients: int) -> float:
+    start = time.perf_counter()
+    responses = await asyncio.gather(*[client.get(URL) for _ in range(clients)])
+    elapsed = time.perf_counter() - start
+    assert all(r.status_code == 200 for r in responses)
+    return elapsed
+
+
+async def run(clients: int, rounds: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for enabled in (False, True):
+            todo_reads.enabled = enabled
+            todo_reads.reset_stats()
+            timings = [await herd(client, clients) for _ in range(rounds)]
+            stats = todo_reads.stats()
+            print(
+                f"合并{'开启' if enabled else '关闭'}: "
+                f"每轮平均 {sum(timings) / len(timings) * 1000:.1f} ms, "
+                f"请求 {stats['requests']}, 实际查询 {stats['executed']}, "
+                f"合并率 {stats['coalescing_ratio']:.2%}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="single-flight请求合并基准测试")
+    parser.add_argument("--todos", type=int, default=20000, help="数据库中的待办事项数量")
+    parser.add_argument("--clients", type=int, default=300, help="每轮并发请求数")
+    parser.add_argument("--rounds", type=int, default=5, help="测试轮数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = setup_database(os.path.join(tmp, "bench.db"), args.todos)
+        try:
+            asyncio.run(run(args.clients, args.rounds))
+        finally:
+            engine.dispose()
@@ -1,10 +1,18 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, insert, inspect, text
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.database import get_db, Base
-from app.models import Todo
+from app.database import get_db, Base, init_db
+from app.models import Todo, ArchivedTodo, Job
+from app.archiver import run_archive_cycle
+from app.singleflight import SingleFlight, todo_reads
+from app.jobs import JobManager, delete_todos_job
+from app import crud
+import asyncio
+import threading
+import time
+from datetime import datetime
 import json
 
 # 创建测试数据库
@@ -13,7 +21,7 @@ engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # 创建测试数据库表
-Base.metadata.create_all(bind=engine)
+init_db(engine)
 
 def override_get_db():
     try:
@@ -34,6 +42,7 @@ class TestTodoAPI:
         # 清空测试数据库
         db = TestingSessionLocal()
         db.query(Todo).delete()
+        db.query(ArchivedTodo).delete()
         db.commit()
         db.close()
     
@@ -315,6 +324,636 @@ class TestTodoAPI:
         data = response.json()
         assert data["total"] == 0
         assert data["data"] == []
+    
+    def test_get_todos_default_projection(self):
+        """测试列表接口默认不返回description"""
+        client.post("/api/todos/", json={"title": "带描述", "description": "很长的描述"})
+        response = client.get("/api/todos/")
+        assert response.status_code == 200
+        todo = response.json()["data"][0]
+        assert set(todo.keys()) == {"id", "title", "completed", "created_at", "updated_at"}
+
+    def test_get_todos_with_fields(self):
+        """测试通过fields参数选择返回字段"""
+        client.post("/api/todos/", json={"title": "带描述", "description": "很长的描述"})
+
+        response = client.get("/api/todos/?fields=title")
+        assert response.status_code == 200
+        assert set(response.json()["data"][0].keys()) == {"id", "title"}
+        # 投影只作用于data中的事项，外层响应字段保持不变
+        assert set(response.json().keys()) == {"success", "message", "data", "total"}
+
+        response = client.get("/api/todos/?fields=title,description")
+        assert response.status_code == 200
+        assert response.json()["data"][0]["description"] == "很长的描述"
+
+    def test_get_todos_projection_skips_description_column(self):
+        """测试投影会下推到SQL，默认列表查询不读取description列"""
+        client.post("/api/todos/", json={"title": "带描述", "description": "很长的描述"})
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            client.get("/api/todos/")
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+        selects = [s for s in statements if s.lstrip().upper().startswith("SELECT") and "todos.title" in s]
+        assert selects
+        assert all("description" not in s for s in selects)
+
+    def test_get_todo_with_fields(self):
+        """测试获取单个待办事项时选择返回字段"""
+        create_response = client.post("/api/todos/", json={"title": "单个", "description": "描述"})
+        todo_id = create_response.json()["data"]["id"]
+
+        response = client.get(f"/api/todos/{todo_id}")
+        assert response.json()["data"]["description"] == "描述"
+
+        response = client.get(f"/api/todos/{todo_id}?fields=completed")
+        assert response.status_code == 200
+        assert response.json()["data"] == {"id": todo_id, "completed": False}
+        assert response.json()["message"] is None
+
+    def test_get_todos_invalid_fields(self):
+        """测试传入无效字段时返回400"""
+        response = client.get("/api/todos/?fields=title,secret")
+        assert response.status_code == 400
+        assert response.json()["success"] == False
+
+        response = client.get("/api/todos/1?fields=secret")
+        assert response.status_code == 400
+
+class TestArchive:
+    """已完成待办事项归档测试类"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        db = TestingSessionLocal()
+        db.query(Todo).delete()
+        db.query(ArchivedTodo).delete()
+        db.commit()
+        db.close()
+
+    def _create_todos(self, titles, completed_indexes):
+        created_todos = []
+        for title in titles:
+            response = client.post("/api/todos/", json={"title": title, "description": f"{title}的描述"})
+            created_todos.append(response.json()["data"])
+        for i in completed_indexes:
+            client.patch(f"/api/todos/{created_todos[i]['id']}/toggle")
+        return created_todos
+
+    def test_archive_moves_completed_todos(self):
+        """测试归档任务分批迁移已完成的待办事项"""
+        created_todos = self._create_todos(["未完成1", "已完成1", "已完成2", "已完成3"], [1, 2, 3])
+
+        archived = run_archive_cycle(session_factory=TestingSessionLocal, archive_after_days=0, batch_size=2, batch_pause=0)
+        assert archived == 3
+
+        # 活动表中只剩未完成的
+        response = client.get("/api/todos/")
+        data = response.json()
+        assert data["total"] == 1
+        assert data["data"][0]["id"] == created_todos[0]["id"]
+
+        # 归档接口可查询到已归档的事项，并保留原ID和描述
+        response = client.get("/api/archive/")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["success"] == True
+        assert data["total"] == 3
+        assert {todo["todo_id"] for todo in data["data"]} == {todo["id"] for todo in created_todos[1:]}
+        assert all(todo["completed"] and "archived_at" in todo for todo in data["data"])
+
+        response = client.get(f"/api/archive/?todo_id={created_todos[1]['id']}")
+        assert response.json()["total"] == 1
+        archive_id = response.json()["data"][0]["id"]
+
+        response = client.get(f"/api/archive/{archive_id}")
+        assert response.status_code == 200
+        assert response.json()["data"]["description"] == "已完成1的描述"
+
+    def test_archive_after_todo_id_reuse(self):
+        """测试待办事项ID被复用后仍能再次归档"""
+        first = self._create_todos(["第一次"], [0])[0]
+        assert run_archive_cycle(session_factory=TestingSessionLocal, archive_after_days=0, batch_pause=0) == 1
+
+        # 最大ID被删除后SQLite会复用该ID
+        second = self._create_todos(["第二次"], [0])[0]
+        assert second["id"] == first["id"]
+        assert run_archive_cycle(session_factory=TestingSessionLocal, archive_after_days=0, batch_pause=0) == 1
+
+        response = client.get(f"/api/archive/?todo_id={first['id']}")
+        data = response.json()
+        assert data["total"] == 2
+        assert {todo["title"] for todo in data["data"]} == {"第一次", "第二次"}
+        assert client.get("/api/todos/").json()["total"] == 0
+
+    def test_archive_skips_recent_completed_todos(self):
+        """测试未超过归档期限的已完成事项不会被归档"""
+        self._create_todos(["已完成1", "未完成1"], [0])
+
+        archived = run_archive_cycle(session_factory=TestingSessionLocal, archive_after_days=1, batch_pause=0)
+        assert archived == 0
+
+        response = client.get("/api/todos/")
+        assert response.json()["total"] == 2
+        response = client.get("/api/archive/")
+        assert response.json()["total"] == 0
+
+    def test_concurrent_archivers(self):
+        """测试多个归档任务同时运行时不会重复处理同一批记录"""
+        db = TestingSessionLocal()
+        db.execute(insert(Todo), [{"title": f"已完成{i}", "completed": True} for i in range(60)])
+        db.commit()
+        db.close()
+
+        results, errors = [], []
+
+        def archive():
+            try:
+                results.append(run_archive_cycle(session_factory=TestingSessionLocal, archive_after_days=0, batch_size=5, batch_pause=0))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=archive) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert sum(results) == 60
+        assert client.get("/api/archive/").json()["total"] == 60
+
+    def test_get_archived_todo_not_found(self):
+        """测试获取不存在的归档待办事项"""
+        response = client.get("/api/archive/999")
+        assert response.status_code == 404
+        assert response.json()["success"] == False
+
+def capture_queries(func):
+    """执行func并返回期间对todos表执行的SELECT语句及其参数"""
+    queries = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM todos" in statement:
+            queries.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        func()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return queries
+
+def explain_query_plan(statement, parameters):
+    """返回语句的EXPLAIN QUERY PLAN明细"""
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    return [row[-1] for row in rows]
+
+class TestQueryPlans:
+    """列表查询执行计划回归测试：所有筛选/排序组合都必须使用索引，且不能出现临时排序"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        db = TestingSessionLocal()
+        db.query(Todo).delete()
+        db.query(ArchivedTodo).delete()
+        db.commit()
+        db.close()
+        for i in range(5):
+            client.post("/api/todos/", json={"title": f"待办事项{i}", "description": "描述"})
+
+    def assert_indexed(self, queries):
+        assert queries
+        for statement, parameters in queries:
+            plan = explain_query_plan(statement, parameters)
+            assert not any("TEMP B-TREE" in detail for detail in plan), (statement, plan)
+            assert all("INDEX" in detail for detail in plan if detail.startswith(("SCAN", "SEARCH"))), (statement, plan)
+            if "WHERE" in statement:
+                assert any(detail.startswith("SEARCH") for detail in plan), (statement, plan)
+
+    @pytest.mark.parametrize("status", [None, "all", "completed", "pending"])
+    @pytest.mark.parametrize("sort", ["created_at", "updated_at", "title"])
+    @pytest.mark.parametrize("order", ["asc", "desc"])
+    @pytest.mark.parametrize("fields", [None, "title,description"])
+    def test_list_query_plan(self, status, sort, order, fields):
+        """测试列表及计数查询的执行计划"""
+        params = {"sort": sort, "order": order}
+        if status:
+            params["status"] = status
+        if fields:
+            params["fields"] = fields
+
+        queries = capture_queries(lambda: client.get("/api/todos/", params=params))
+        self.assert_indexed(queries)
+
+    def test_archive_query_plan(self):
+        """测试归档任务选取批次的查询执行计划"""
+        queries = capture_queries(
+            lambda: run_archive_cycle(session_factory=TestingSessionLocal, archive_after_days=1, batch_pause=0)
+        )
+        self.assert_indexed(queries)
+
+    def test_sort_orders(self):
+        """测试排序字段和排序方向"""
+        response = client.get("/api/todos/?sort=title&order=asc")
+        assert response.status_code == 200
+        titles = [todo["title"] for todo in response.json()["data"]]
+        assert titles == sorted(titles)
+
+        response = client.get("/api/todos/?sort=title&order=desc")
+        titles = [todo["title"] for todo in response.json()["data"]]
+        assert titles == sorted(titles, reverse=True)
+
+        # 创建时间相同时按id排序，保证顺序稳定
+        response = client.get("/api/todos/?sort=created_at&order=asc")
+        ids = [todo["id"] for todo in response.json()["data"]]
+        assert ids == sorted(ids)
+
+    def test_invalid_sort(self):
+        """测试无效的排序参数"""
+        assert client.get("/api/todos/?sort=description").status_code == 422
+        assert client.get("/api/todos/?order=up").status_code == 422
+
+class TestInitDb:
+    """数据库初始化测试类"""
+
+    def test_init_db_upgrades_existing_database(self, tmp_path):
+        """测试已有的旧版数据库在启动时补建复合索引、删除废弃索引并切换为增量VACUUM模式"""
+        old_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with old_engine.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE TABLE todos (id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL, description TEXT, "
+                "completed BOOLEAN NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, "
+                "updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL)"
+            )
+            conn.exec_driver_sql("CREATE INDEX ix_todos_completed ON todos (completed)")
+
+        init_db(old_engine)
+        init_db(old_engine)  # 可重复执行
+
+        indexes = {index["name"] for index in inspect(old_engine).get_indexes("todos")}
+        assert "ix_todos_completed" not in indexes
+        assert {index.name for index in Todo.__table__.indexes} <= indexes
+        with old_engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
+        old_engine.dispose()
+
+class TestSingleFlight:
+    """相同并发读请求合并测试类"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        db = TestingSessionLocal()
+        db.query(Todo).delete()
+        db.commit()
+        db.close()
+
+    def test_concurrent_calls_share_one_execution(self):
+        """测试相同key的并发调用只执行一次"""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def load(value):
+            calls.append(value)
+            release.wait(5)
+            return value * 2
+
+        async def herd():
+            tasks = [asyncio.ensure_future(flight.do("key", load, 21)) for _ in range(20)]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        results = asyncio.run(herd())
+        assert results == [42] * 20
+        assert len(calls) == 1
+        stats = flight.stats()
+        assert stats["executed"] == 1
+        assert stats["shared"] == 19
+        assert stats["coalescing_ratio"] == 0.95
+        assert stats["in_flight"] == 0
+
+    def test_different_generations_do_not_share(self):
+        """测试写入代数不同的key不会共享进行中的查询"""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def load(generation):
+            calls.append(generation)
+            release.wait(5)
+            return generation
+
+        async def scenario():
+            before_write = asyncio.ensure_future(flight.do(("todos", 1), load, 1))
+            await asyncio.sleep(0.05)
+            after_write = asyncio.ensure_future(flight.do(("todos", 2), load, 2))
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(before_write, after_write)
+
+        assert asyncio.run(scenario()) == [1, 2]
+        assert calls == [1, 2]
+        assert flight.stats()["shared"] == 0
+
+    def test_errors_are_shared_and_not_cached(self):
+        """测试执行失败时所有等待者收到异常，且失败结果不会被缓存"""
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError("boom")
+
+        async def scenario():
+            results = await asyncio.gather(
+                flight.do("key", fail), flight.do("key", fail), return_exceptions=True
+            )
+            assert all(isinstance(r, ValueError) for r in results)
+            return await flight.do("key", lambda: "ok")
+
+        assert asyncio.run(scenario()) == "ok"
+
+    def test_writes_bump_generation(self):
+        """测试API写入和批量写入都会改变写入代数，批量写入每条语句只加一"""
+        db = TestingSessionLocal()
+        generation = crud.get_todo_generation(db)
+        db.close()
+
+        for i in range(3):
+            client.post("/api/todos/", json={"title": f"写操作{i}"})
+        db = TestingSessionLocal()
+        after_api_write = crud.get_todo_generation(db)
+        assert after_api_write == generation + 3
+
+        assert crud.delete_all_todos(db) == 3
+        assert crud.get_todo_generation(db) == after_api_write + 1
+        db.close()
+
+    def test_read_after_write_sees_new_data(self):
+        """测试其他会话写入后的读取得到最新数据"""
+        client.post("/api/todos/", json={"title": "写操作"})
+        assert client.get("/api/todos/").json()["total"] == 1
+        db = TestingSessionLocal()
+        crud.delete_all_todos(db)
+        db.close()
+        assert client.get("/api/todos/").json()["total"] == 0
+
+    def test_metrics_endpoint(self):
+        """测试指标接口返回合并统计"""
+        client.get("/api/todos/")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["success"] == True
+        assert data["singleflight"]["requests"] >= 1
+        assert "coalescing_ratio" in data["singleflight"]
+
+def wait_for_job(job_id, timeout=5):
+    """轮询任务状态直到任务结束"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/api/jobs/{job_id}").json()["data"]
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"任务 {job_id} 未在 {timeout} 秒内结束")
+
+class TestBackgroundJobs:
+    """批量删除后台任务测试类"""
+
+    def setup_method(self):
+        """每个测试方法执行前的设置"""
+        db = TestingSessionLocal()
+        db.query(Todo).delete()
+        db.query(Job).delete()
+        db.commit()
+        db.close()
+
+    def _create_todos(self, count, completed_every=0):
+        for i in range(count):
+            response = client.post("/api/todos/", json={"title": f"待办事项{i}"})
+            if completed_every and i % completed_every == 0:
+                client.patch(f"/api/todos/{response.json()['data']['id']}/toggle")
+
+    def test_delete_completed_in_background(self):
+        """测试后台删除已完成事项，立即返回202并可查询进度"""
+        self._create_todos(6, completed_every=2)
+
+        response = client.delete("/api/todos/completed?background=true")
+        assert response.status_code == 202
+        data = response.json()
+        assert data["success"] == True
+        assert data["data"]["type"] == "delete_completed_todos"
+
+        job = wait_for_job(data["data"]["id"])
+        assert job["status"] == "completed"
+        assert job["total"] == 3
+        assert job["processed"] == 3
+
+        response = client.get("/api/todos/")
+        assert response.json()["total"] == 3
+        assert all(not todo["completed"] for todo in response.json()["data"])
+
+    def test_delete_all_in_background(self):
+        """测试后台清空所有待办事项"""
+        self._create_todos(4)
+
+        response = client.delete("/api/todos/all?background=true")
+        assert response.status_code == 202
+
+        job = wait_for_job(response.json()["data"]["id"])
+        assert job["status"] == "completed"
+        assert job["processed"] == 4
+        assert client.get("/api/todos/").json()["total"] == 0
+
+    def test_delete_todos_chunk(self):
+        """测试按块删除，每次最多删除chunk_size条，并从上一块最后的id之后继续"""
+        self._create_todos(5, completed_every=2)
+        db = TestingSessionLocal()
+        max_id = crud.get_max_todo_id(db)
+        deleted, after_id = crud.delete_todos_chunk(db, max_id=max_id, completed_only=True, chunk_size=2)
+        assert deleted == 2
+        deleted, after_id = crud.delete_todos_chunk(db, max_id=max_id, completed_only=True, after_id=after_id, chunk_size=2)
+        assert deleted == 1
+        assert after_id == max_id
+        assert crud.delete_todos_chunk(db, max_id=max_id, completed_only=True, after_id=after_id, chunk_size=2)[0] == 0
+        assert crud.get_todos_count(db) == 2
+        db.close()
+
+    def test_delete_todos_chunk_rechecks_conditions(self):
+        """测试选取之后被重新标记为未完成的事项不会被删除，删除数按实际删除的行数计算"""
+        self._create_todos(2, completed_every=1)
+        db = TestingSessionLocal()
+        max_id = crud.get_max_todo_id(db)
+
+        # 在选取和删除之间把最后一条重新标记为未完成
+        def uncomplete(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("DELETE FROM TODOS"):
+                cursor.connection.execute("UPDATE todos SET completed = 0 WHERE id = ?", (max_id,))
+
+        event.listen(engine, "before_cursor_execute", uncomplete)
+        try:
+            deleted, after_id = crud.delete_todos_chunk(db, max_id=max_id, completed_only=True)
+        finally:
+            event.remove(engine, "before_cursor_execute", uncomplete)
+
+        assert deleted == 1
+        assert after_id == max_id
+        remaining = crud.get_todo(db, max_id)
+        assert remaining is not None and not remaining.completed
+        db.close()
+
+    def _get_job(self, job_id):
+        db = TestingSessionLocal()
+        job = crud.get_job(db, job_id)
+        db.close()
+        return job
+
+    def _run_job(self, manager, func, during=None):
+        """提交任务并通过数据库中的任务记录轮询进度"""
+        job_id = manager.submit(engine, "delete_all_todos", func).id
+        deadline = time.time() + 5
+        if during is not None:
+            while self._get_job(job_id).processed == 0 and time.time() < deadline:
+                time.sleep(0.01)
+            during()
+        while not self._get_job(job_id).finished and time.time() < deadline:
+            time.sleep(0.02)
+        return self._get_job(job_id)
+
+    def test_delete_todos_job_in_chunks(self):
+        """测试任务分多块执行并记录进度"""
+        self._create_todos(5)
+        db = TestingSessionLocal()
+        max_id = crud.get_max_todo_id(db)
+        db.close()
+
+        manager = JobManager()
+        try:
+            job = self._run_job(manager, delete_todos_job(completed_only=False, max_id=max_id, chunk_size=2, chunk_pause=0))
+        finally:
+            manager.shutdown()
+
+        assert job.status == "completed"
+        assert job.total == 5
+        assert job.processed == 5
+
+    def test_delete_todos_job_keeps_todos_created_while_running(self):
+        """测试任务执行期间新建的待办事项不会被删除"""
+        self._create_todos(3)
+        db = TestingSessionLocal()
+        max_id = crud.get_max_todo_id(db)
+        db.close()
+        created = []
+
+        manager = JobManager()
+        try:
+            job = self._run_job(
+                manager,
+                delete_todos_job(completed_only=False, max_id=max_id, chunk_size=1, chunk_pause=0.1),
+                during=lambda: created.append(client.post("/api/todos/", json={"title": "任务期间新建"}).json()["data"])
+            )
+        finally:
+            manager.shutdown()
+
+        assert job.status == "completed"
+        assert job.total == 3
+        assert job.processed == 3
+        response = client.get("/api/todos/")
+        assert response.json()["total"] == 1
+        assert response.json()["data"][0]["id"] == created[0]["id"]
+
+    def test_delete_completed_job_keeps_todos_completed_later(self):
+        """测试提交任务之后才完成的事项不会被删除"""
+        self._create_todos(2, completed_every=2)
+        db = TestingSessionLocal()
+        max_id = crud.get_max_todo_id(db)
+        db.close()
+        # 模拟提交时间早于已有事项的更新时间：提交后才完成的事项（更新时间晚于提交时间）应保留
+        updated_before = datetime(2000, 1, 1)
+
+        manager = JobManager()
+        try:
+            job = self._run_job(manager, delete_todos_job(
+                completed_only=True, max_id=max_id, updated_before=updated_before, chunk_pause=0
+            ))
+        finally:
+            manager.shutdown()
+
+        assert job.status == "completed"
+        assert job.processed == 0
+        assert client.get("/api/todos/").json()["total"] == 2
+
+    def test_shutdown_fails_queued_jobs(self):
+        """测试服务停止时被取消的排队任务标记为失败"""
+        started, release = threading.Event(), threading.Event()
+
+        def blocking(job, db, stop_event):
+            started.set()
+            release.wait(5)
+
+        manager = JobManager()
+        running = manager.submit(engine, "delete_all_todos", blocking)
+        queued = manager.submit(engine, "delete_all_todos", blocking)
+        assert started.wait(5)
+        manager.shutdown()
+
+        job = self._get_job(queued.id)
+        assert job.status == "failed"
+        assert job.error
+        release.set()
+        deadline = time.time() + 5
+        while not self._get_job(running.id).finished and time.time() < deadline:
+            time.sleep(0.02)
+        assert self._get_job(running.id).status == "completed"
+
+    def test_recover_fails_unfinished_jobs(self):
+        """测试启动时将遗留的pending/running任务标记为失败"""
+        db = TestingSessionLocal()
+        pending = crud.create_job(db, "delete_all_todos")
+        running = crud.create_job(db, "delete_all_todos")
+        running.status = Job.RUNNING
+        completed = crud.create_job(db, "delete_all_todos")
+        completed.status = Job.COMPLETED
+        db.commit()
+        job_ids = [pending.id, running.id, completed.id]
+        db.close()
+
+        assert JobManager().recover(engine) == 2
+        jobs = [self._get_job(job_id) for job_id in job_ids]
+        assert [job.status for job in jobs] == ["failed", "failed", "completed"]
+        assert jobs[0].error and jobs[0].finished_at is not None
+
+    def test_finished_jobs_are_pruned(self):
+        """测试只保留最近的已结束任务记录"""
+        db = TestingSessionLocal()
+        for _ in range(4):
+            job = crud.create_job(db, "delete_all_todos")
+            job.status = Job.COMPLETED
+            db.commit()
+        running = crud.create_job(db, "delete_all_todos")
+        job_ids = [job.id for job in crud.get_jobs(db)]
+
+        assert crud.prune_jobs(db, keep=2) >= 3
+        remaining = {job.id for job in crud.get_jobs(db)}
+        assert running.id in remaining
+        assert len(remaining) == 2
+        assert remaining == set(job_ids[:2])
+        db.close()
+
+    def test_get_job_not_found(self):
+        """测试获取不存在的任务"""
+        response = client.get("/api/jobs/unknown")
+        assert response.status_code == 404
+        assert response.json()["success"] == False
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
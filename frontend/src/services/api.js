@@ -42,9 +42,9 @@ api.interceptors.response.use(
 
 // 待办事项API
 export const todoAPI = {
-  // 获取待办事项列表
+  // 获取待办事项列表（列表默认不返回description，这里显式请求以便展示描述）
   getTodos: async (status = 'all', skip = 0, limit = 100) => {
-    const params = { skip, limit }
+    const params = { skip, limit, fields: 'title,description,completed,created_at,updated_at' }
     if (status && status !== 'all') {
       params.status = status
     }